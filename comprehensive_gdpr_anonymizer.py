@@ -10,45 +10,362 @@ This script provides a unified solution that combines:
 """
 
 import classla
+import bisect
 import re
 import json
+import multiprocessing
+import os
+import threading
 import phonenumbers
-from typing import Dict, List, Tuple, Optional
+from phonenumbers.phonenumberutil import COUNTRY_CODE_TO_REGION_CODE
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import lru_cache
+
+try:
+    # Optional linear-time regex engine, only needed for regex_backend='re2'
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    # Optional backtracking engine with atomic groups, only needed for regex_backend='regex'
+    import regex
+except ImportError:
+    regex = None
+
+try:
+    # Optional multi-pattern scanner, only needed for use_hyperscan=True
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Separator-stripping tables for str.translate, used by the validators
+_CARD_STRIP_TABLE = str.maketrans('', '', '- \t\n\r\f\v')
+_PHONE_STRIP_TABLE = str.maketrans('', '', '-() \t\n\r\f\v')
+
+# Lengths a card number can have, checked before running Luhn
+_CARD_LENGTHS = frozenset(range(12, 20))
+
+# Byte table mapping ASCII digits to the digit sum of their double, so the
+# Luhn check can run as bytes.translate + sum in C
+_LUHN_DOUBLE_TABLE = bytes.maketrans(b'0123456789', bytes((0, 2, 4, 6, 8, 1, 3, 5, 7, 9)))
+
+# A pattern that is exactly \b\d{N}\b: a whole number of N digits
+_FIXED_LENGTH_DIGITS_RE = re.compile(r'\\b\\d\{(\d+)\}\\b')
+
+# Runs of digits separated by at most 4 other characters, the most punctuation
+# PhoneNumberMatcher allows between the digit blocks of one number
+_PHONE_DIGIT_RUN_RE = re.compile(r'\d(?:\D{0,4}\d)*')
+
+# Context kept on both sides of a digit run handed to PhoneNumberMatcher: room for
+# a leading '+' or '(', the letter checks around the number and an extension
+_PHONE_WINDOW_PAD = 40
+
+
+def apply_spans(text: str, spans: List[Tuple[int, int, str]], start: int = 0,
+                end: Optional[int] = None) -> str:
+    """
+    Replace spans of text in a single pass and return the rebuilt text[start:end].
+    
+    Args:
+        text (str): Text to rewrite
+        spans (List[Tuple[int, int, str]]): (start, end, replacement) triples, sorted by
+            start and not overlapping, all within [start, end)
+        start (int): Offset where the output begins
+        end (int): Offset where the output ends (default: end of text)
+        
+    Returns:
+        str: The rewritten slice of text
+    """
+    if end is None:
+        end = len(text)
+    
+    parts = []
+    last_end = start
+    for span_start, span_end, replacement in spans:
+        if span_start < last_end:
+            raise ValueError(f"Span ({span_start}, {span_end}) overlaps the previous span or precedes start")
+        parts.append(text[last_end:span_start])
+        parts.append(replacement)
+        last_end = span_end
+    
+    parts.append(text[last_end:end])
+    return ''.join(parts)
+
+
+def _shortest_phone_number(metadata) -> int:
+    """Fewest digits of a national number in a region's phone metadata."""
+    lengths = [length for length in metadata.general_desc.possible_length if length > 0]
+    return min(lengths) if lengths else 1
+
+
+@lru_cache(maxsize=None)
+def _min_phone_digits(region: str) -> int:
+    """Fewest digits of a valid phone number PhoneNumberMatcher can find for a default region."""
+    # Numbers written with a '+' can belong to any region: country code + national number
+    fewest = None
+    for country_code, regions in COUNTRY_CODE_TO_REGION_CODE.items():
+        for code_region in regions:
+            metadata = phonenumbers.PhoneMetadata.metadata_for_region_or_calling_code(country_code, code_region)
+            if metadata is not None:
+                digits = len(str(country_code)) + _shortest_phone_number(metadata)
+                fewest = digits if fewest is None else min(fewest, digits)
+    
+    # Numbers without one are read as national numbers of the region
+    metadata = phonenumbers.PhoneMetadata.metadata_for_region(region)
+    if metadata is not None:
+        fewest = min(fewest, _shortest_phone_number(metadata))
+    return fewest
+
+
+@lru_cache(maxsize=4096)
+def _phone_number_details(country_code: int, national_number: int, extension: Optional[str],
+                          italian_leading_zero: Optional[bool],
+                          number_of_leading_zeros: Optional[int]) -> Optional[Tuple[str, str, int]]:
+    """
+    Validate a phone number and look up its metadata, memoized by the number itself.
+    
+    Returns:
+        Optional[Tuple[str, str, int]]: (international format, region, number type), or
+            None if the number is not valid
+    """
+    number = phonenumbers.PhoneNumber(
+        country_code=country_code,
+        national_number=national_number,
+        extension=extension,
+        italian_leading_zero=italian_leading_zero,
+        number_of_leading_zeros=number_of_leading_zeros
+    )
+    if not phonenumbers.is_valid_number(number):
+        return None
+    
+    return (
+        phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.INTERNATIONAL),
+        phonenumbers.region_code_for_number(number),
+        phonenumbers.number_type(number)
+    )
+
+
+def _stop_at_first_match(pattern_id, start, end, flags, context):
+    """Hyperscan match handler that ends the scan at the first match."""
+    return True
+
 
 class ComprehensiveGDPRAnonymizer:
     """
     Comprehensive GDPR-compliant anonymizer combining CLASSLA NER + Presidio patterns + regional data.
     """
     
-    def __init__(self, language: str = 'sl', use_gpu: bool = False):
+    REGEX_BACKENDS = ('re', 're2', 'regex')
+    
+    # Pattern types whose formats are pure ASCII, matched with re.ASCII semantics
+    ASCII_PATTERN_TYPES = {
+        'CREDIT_CARD', 'IP_ADDRESS', 'IBAN',
+        'PERSONAL_ID', 'TAX_NUMBER', 'BANK_ACCOUNT'
+    }
+    
+    # Confidence of pattern-based detections (types not listed are 'high')
+    PATTERN_CONFIDENCE = {
+        'DATE': 'medium',
+        'ADDRESS': 'medium'
+    }
+    
+    # Region used to read nationally formatted phone numbers, per language
+    PHONE_REGIONS = {
+        'sl': 'SI',
+        'hr': 'HR',
+        'sr': 'RS',
+        'bg': 'BG',
+        'mk': 'MK'
+    }
+    
+    # Languages whose CLASSLA models were already downloaded in this process
+    _downloaded_languages = set()
+    
+    # CLASSLA pipelines already loaded in this process, by (language, use_gpu, batch_size)
+    _pipelines = {}
+    
+    def __init__(self, language: str = 'sl', use_gpu: bool = False, regex_backend: str = 're', nlp=None,
+                 batch_size: int = 64, phone_regions: Optional[List[str]] = None,
+                 pattern_cache_size: int = 0, use_hyperscan: bool = False):
         """
         Initialize the comprehensive GDPR anonymizer.
         
         Args:
             language (str): Language code ('sl', 'hr', 'sr', 'bg', 'mk')
-            use_gpu (bool): Whether to use GPU acceleration
+            use_gpu (bool): Whether to use GPU acceleration (default: False; CLASSLA falls back
+                to CPU when no CUDA device is available)
+            regex_backend (str): Regex engine for pattern scanning ('re', 're2' or 'regex').
+                RE2 matches in linear time but only for purely ASCII formats (IDs, IBANs,
+                IP addresses...); pattern sets with letters, and patterns RE2 cannot
+                express (e.g. lookaheads), fall back to Python's re.
+            nlp: Pre-built CLASSLA pipeline to reuse instead of creating a new one
+                (False skips CLASSLA entirely and only pattern-based detection runs)
+            batch_size (int): Number of documents per CLASSLA call in anonymize_batch,
+                also used as the POS/lemma/NER processor batch size
+            phone_regions (List[str]): Regions tried for numbers without a '+' prefix
+                (default: the region of the language, e.g. 'SI' for 'sl')
+            pattern_cache_size (int): Number of texts whose pattern-based detections are
+                kept in an in-memory LRU cache (default: 0, caching disabled). The cache
+                holds raw text, so only enable it for short-lived processes.
+            use_hyperscan (bool): Pre-screen texts with a Hyperscan database of all patterns
+                and skip the regex scan when nothing can match (requires `hyperscan`)
         """
+        if regex_backend not in self.REGEX_BACKENDS:
+            raise ValueError(f"Unsupported regex backend: {regex_backend}")
+        if regex_backend == 're2' and re2 is None:
+            raise ImportError("regex_backend='re2' requires the 'google-re2' package")
+        if regex_backend == 'regex' and regex is None:
+            raise ImportError("regex_backend='regex' requires the 'regex' package")
+        if use_hyperscan and hyperscan is None:
+            raise ImportError("use_hyperscan=True requires the 'hyperscan' package")
+        
         self.language = language
-        self.nlp = None
-        self._setup_classla(use_gpu)
+        self.regex_backend = regex_backend
+        self.batch_size = batch_size
+        self.phone_regions = list(phone_regions or [self.PHONE_REGIONS.get(language, 'SI')])
+        self._phone_min_digits = min(_min_phone_digits(region) for region in self.phone_regions)
+        self.pattern_cache_size = pattern_cache_size
+        self._pattern_cache = OrderedDict()
+        self._pattern_cache_lock = threading.Lock()
+        self.use_hyperscan = use_hyperscan
+        self._hs_local = threading.local()
+        # Runs pattern detection while CLASSLA tags the same text; created on first use
+        # (and again after a fork, whose child has none of the parent's threads)
+        self._pattern_executor = None
+        self._pattern_executor_pid = None
+        self._executor_lock = threading.Lock()
+        # Worker processes of anonymize_many, started on first use and kept for later calls
+        self._process_pool = None
+        self._process_pool_key = None
+        self.nlp = nlp
+        if self.nlp is None:
+            self._setup_classla(use_gpu)
         self._setup_presidio_patterns()
         self._setup_regional_patterns()
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Shut down the worker threads and processes; the anonymizer starts new ones if used again."""
+        with self._executor_lock:
+            executor, self._pattern_executor = self._pattern_executor, None
+            pool, self._process_pool = self._process_pool, None
+        if executor is not None and self._pattern_executor_pid == os.getpid():
+            executor.shutdown(wait=True)
+        if pool is not None and self._process_pool_key[0] == os.getpid():
+            pool.shutdown(wait=True)
+    
+    def _get_pattern_executor(self) -> ThreadPoolExecutor:
+        """Get the thread pool for pattern detection, creating it on first use in this process."""
+        pid = os.getpid()
+        with self._executor_lock:
+            if self._pattern_executor is None or self._pattern_executor_pid != pid:
+                self._pattern_executor = ThreadPoolExecutor(thread_name_prefix='gdpr-patterns')
+                self._pattern_executor_pid = pid
+            return self._pattern_executor
+    
+    def _get_process_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Get the worker processes of anonymize_many, starting them on first use."""
+        key = (os.getpid(), workers)
+        with self._executor_lock:
+            if self._process_pool is not None and self._process_pool_key != key:
+                # A pool of another size is replaced; one inherited through a fork is
+                # not ours to shut down
+                if self._process_pool_key[0] == key[0]:
+                    self._process_pool.shutdown(wait=False)
+                self._process_pool = None
+            
+            if self._process_pool is None:
+                # Start the workers from a fresh interpreter rather than by forking this
+                # process, whose threads (pattern pool, torch) would not survive the fork
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.language, self.regex_backend, self.phone_regions, self.use_hyperscan)
+                )
+                self._process_pool_key = key
+            return self._process_pool
+    
     def _setup_classla(self, use_gpu: bool):
         """Setup CLASSLA pipeline with NER processor."""
         try:
-            classla.download(self.language)
-            self.nlp = classla.Pipeline(
-                lang=self.language,
-                use_gpu=use_gpu,
-                processors='tokenize,pos,lemma,ner'
-            )
+            self.nlp = self.load_pipeline(self.language, use_gpu, self.batch_size)
             print(f"✓ CLASSLA pipeline ready for {self.language}")
         except Exception as e:
             print(f"✗ Error setting up CLASSLA: {e}")
             raise
     
+    @classmethod
+    def load_pipeline(cls, language: str, use_gpu: bool = False, batch_size: int = 64):
+        """
+        Get a CLASSLA NER pipeline, loading it on the first call for these settings.
+        
+        Loaded pipelines are kept for the life of the process, so anonymizers built with
+        the same language, device and batch size share one copy of the model weights.
+        """
+        key = (language, use_gpu, batch_size)
+        nlp = cls._pipelines.get(key)
+        if nlp is None:
+            cls.ensure_model(language)
+            cls.prefetch_model(language)
+            nlp = cls._pipelines[key] = classla.Pipeline(
+                lang=language,
+                use_gpu=use_gpu,
+                processors='tokenize,pos,lemma,ner',
+                pos_batch_size=batch_size,
+                lemma_batch_size=batch_size,
+                ner_batch_size=batch_size
+            )
+        return nlp
+    
+    @classmethod
+    def ensure_model(cls, language: str):
+        """Download CLASSLA models for a language at most once per process."""
+        if language not in cls._downloaded_languages:
+            classla.download(language)
+            cls._downloaded_languages.add(language)
+    
+    @staticmethod
+    def prefetch_model(language: str):
+        """
+        Ask the kernel to start reading a language's CLASSLA model files into the page cache.
+        
+        The pipeline then loads its checkpoints from memory instead of waiting on disk
+        reads one file at a time. Only available where os.posix_fadvise exists (Linux);
+        elsewhere this does nothing.
+        """
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        
+        # Same default location classla.download uses
+        resources_dir = os.environ.get(
+            'CLASSLA_RESOURCES_DIR', os.path.join(os.path.expanduser('~'), 'classla_resources')
+        )
+        for root, _, files in os.walk(os.path.join(resources_dir, language)):
+            for name in files:
+                try:
+                    fd = os.open(os.path.join(root, name), os.O_RDONLY)
+                except OSError:
+                    continue
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                except OSError:
+                    pass
+                finally:
+                    os.close(fd)
+    
     def _setup_presidio_patterns(self):
         """Setup regex patterns from Microsoft Presidio."""
         
@@ -68,17 +385,21 @@ class ComprehensiveGDPRAnonymizer:
         
         # Email Patterns (from Presidio)
         self.email_patterns = [
-            # Comprehensive Email Pattern
-            r"\b((([!#$%&'*+\-/=?^_`{|}~\w])|([!#$%&'*+\-/=?^_`{|}~\w][!#$%&'*+\-/=?^_`{|}~\.\w]{0,}[!#$%&'*+\-/=?^_`{|}~\w]))[@]\w+([-.]\w+)*\.\w+([-.]\w+)*)\b",
-            # Simple Email Pattern
-            r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
+            # Comprehensive Email Pattern (the original one with its nested
+            # alternations unrolled, so it backtracks linearly)
+            r"\b[!#$%&'*+\-/=?^_`{|}~\w](?:[!#$%&'*+\-/=?^_`{|}~.\w]*[!#$%&'*+\-/=?^_`{|}~\w])?"
+            r"@\w+(?:[-.]\w+)*\.\w+(?:[-.]\w+)*\b",
+            # Simple Email Pattern (\w keeps non-ASCII local parts and domains such as
+            # 'čokolada.si' or 'пример.бг', and a TLD glued to digits)
+            r"\b[\w.%+-]+@[\w.-]+\.\w{2,}"
         ]
         
         # Phone Number Patterns (basic patterns for initial detection)
         # We'll use Google's phonenumbers library for validation
         self.phone_patterns = [
-            # Basic patterns to find potential phone numbers
-            r"\b\+?[\d\s\-\(\)\.]{7,20}\b",
+            # Basic pattern to find potential phone numbers: an optional country
+            # code followed by 2-4 digit groups, so punctuation runs never match
+            r"(?:\+\d{1,3}[\s\-\.]?)?(?:\(?\d{2,4}\)?[\s\-\.]?){2,4}\d{2,4}",
             # Common formats
             r"\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b",  # US format
             r"\b\d{2}[-.\s]?\d{3}[-.\s]?\d{3,4}\b",  # European format
@@ -114,6 +435,24 @@ class ComprehensiveGDPRAnonymizer:
         self.iban_patterns = [
             r'\b[A-Z]{2}[0-9]{2}[A-Z0-9]{4}[0-9]{7}([A-Z0-9]?){0,16}\b'
         ]
+        
+        # Fuse all patterns into one expression so the text is scanned once
+        presidio = (
+            [('CREDIT_CARD', p) for p in self.credit_card_patterns] +
+            [('EMAIL', p) for p in self.email_patterns] +
+            [('IP_ADDRESS', p) for p in self.ip_patterns] +
+            [('DATE', p) for p in self.date_patterns] +
+            [('URL', p) for p in self.url_patterns] +
+            [('IBAN', p) for p in self.iban_patterns]
+        )
+        self._presidio_rx, self._presidio_groups, self._presidio_later = self._combine_patterns(presidio)
+        self._presidio_prefilter = self._build_prefilter(presidio, self._presidio_rx)
+        
+        # Matches of these types are only kept if they pass validation
+        self._validators = {
+            'CREDIT_CARD': self._validate_credit_card,
+            'EMAIL': self._validate_email
+        }
     
     def _setup_regional_patterns(self):
         """Setup regional patterns for specific countries."""
@@ -129,12 +468,11 @@ class ComprehensiveGDPRAnonymizer:
         # Tax Number Patterns (regional)
         self.tax_patterns = {
             'sl': [
-                # Slovenian Tax Number (Davčna številka) - 8 digits
+                # Slovenian Tax Number (Davčna številka) and Company Registration
+                # Number (Matična številka) - both 8 digits
                 r'\b\d{8}\b',
                 # Slovenian VAT Number (ID za DDV) - SI + 8 digits
-                r'\bSI\d{8}\b',
-                # Slovenian Company Registration Number (Matična številka) - 8 digits
-                r'\b\d{8}\b'
+                r'\bSI\d{8}\b'
             ],
             'hr': [
                 # Croatian Tax Number (OIB) - 11 digits
@@ -199,169 +537,321 @@ class ComprehensiveGDPRAnonymizer:
                 r'\bBG\d{2}\s?\d{4}\s?\d{4}\s?\d{4}\s?\d{4}\s?\d{2}\b'
             ]
         }
+        
+        # The language is fixed at construction, so only its patterns are fused
+        lang = self.language
+        regional = (
+            [('PERSONAL_ID', p) for p in self.id_patterns.get(lang, [])] +
+            [('TAX_NUMBER', p) for p in self.tax_patterns.get(lang, [])] +
+            [('BANK_ACCOUNT', p) for p in self.bank_account_patterns.get(lang, [])] +
+            [('ADDRESS', p) for p in self.address_patterns.get(lang, [])]
+        )
+        
+        # Some ID and tax formats share a digit length (e.g. Croatian OIB); the first,
+        # more sensitive type always wins the alternation, so drop the repeats
+        seen_patterns = set()
+        self._active_regional = []
+        for entity_type, pattern in regional:
+            if pattern not in seen_patterns:
+                seen_patterns.add(pattern)
+                self._active_regional.append((entity_type, pattern))
+        if self._active_regional:
+            self._regional_rx, self._regional_groups, self._regional_later = self._combine_patterns(
+                self._active_regional
+            )
+            self._regional_prefilter = self._build_prefilter(self._active_regional, self._regional_rx)
+        else:
+            self._regional_rx, self._regional_groups, self._regional_later = None, {}, {}
+            self._regional_prefilter = None
+    
+    def _combine_patterns(self, pattern_list: List[Tuple[str, str]]) -> Tuple[re.Pattern, Dict[str, str], Dict]:
+        """
+        Fuse (entity_type, pattern) pairs into a single alternation.
+        
+        Each pattern becomes a named group; the returned mapping resolves
+        a match's ``lastgroup`` back to its entity type. Whole numbers of a fixed
+        length (\\b\\d{N}\\b) share one group, mapped to a {length: entity_type} dict.
+        The third value maps each group to the (group, compiled pattern) pairs that come
+        after it in the alternation, so _scan_combined can try them at the same start.
+        """
+        # Fixed-length numbers of different lengths never match at the same start, so
+        # one group scanning the digits once replaces an alternative per length
+        # (the first type listed for a length wins, as it would in the alternation)
+        fixed_lengths = [
+            _FIXED_LENGTH_DIGITS_RE.fullmatch(pattern) if entity_type in self.ASCII_PATTERN_TYPES else None
+            for entity_type, pattern in pattern_list
+        ]
+        length_types = {}
+        for (entity_type, _), fixed in zip(pattern_list, fixed_lengths):
+            if fixed:
+                length_types.setdefault(int(fixed.group(1)), entity_type)
+        merge = len(length_types) > 1
+        
+        group_types = {}
+        alternatives = []
+        for i, ((entity_type, pattern), fixed) in enumerate(zip(pattern_list, fixed_lengths)):
+            if merge and fixed:
+                # The shared group takes the place of the first fixed-length pattern
+                if any(isinstance(types, dict) for types in group_types.values()):
+                    continue
+                group = f'DIGITS_{i}'
+                group_types[group] = length_types
+                pattern = self._fixed_lengths_pattern(sorted(length_types))
+            else:
+                group = f'{entity_type}_{i}'
+                group_types[group] = entity_type
+            # ASCII-only \d and \b are cheaper than Unicode table lookups and behave the
+            # same on every engine (RE2 is ASCII-only already and has no scoped flags).
+            # This is stricter about digits but not about boundaries: a non-ASCII letter
+            # is not a word character, so 'č2005800500999' matches as an ID.
+            ascii_pattern = f'(?a:{pattern})' if entity_type in self.ASCII_PATTERN_TYPES else pattern
+            alternatives.append((group, pattern if self.regex_backend == 're2' else ascii_pattern, ascii_pattern))
+        fallback = '|'.join(f'(?P<{group}>{pattern})' for group, _, pattern in alternatives)
+        if all(entity_type in self.ASCII_PATTERN_TYPES for entity_type, _ in pattern_list):
+            rx = self._compile('|'.join(f'(?P<{group}>{pattern})' for group, pattern, _ in alternatives),
+                               fallback=fallback)
+        else:
+            # RE2's \w and \b are ASCII-only, so 'Tržič' would split into words; keep
+            # patterns that match letters (addresses, dates, emails...) on Python's re
+            rx = re.compile(fallback)
+        
+        # Compile the groups with the engine the fused pattern ended up on (RE2 falls
+        # back to re), so they match exactly as they do inside it
+        if isinstance(rx, re.Pattern):
+            group_patterns = [(group, re.compile(pattern)) for group, _, pattern in alternatives]
+        else:
+            group_patterns = [(group, self._compile(pattern)) for group, pattern, _ in alternatives]
+        later_groups = {group: group_patterns[i + 1:] for i, (group, _) in enumerate(group_patterns)}
+        return rx, group_types, later_groups
+    
+    @staticmethod
+    def _fixed_lengths_pattern(lengths: List[int]) -> str:
+        """Pattern for a whole number of any of the sorted lengths, e.g. \\b[0-9]{8}(?:[0-9]{5})?\\b."""
+        # [0-9] rather than \\d: the regex module drops a scoped (?a:) flag inside (?:...)
+        pattern = ''
+        for shorter, longer in reversed(list(zip(lengths, lengths[1:]))):
+            pattern = f'(?:[0-9]{{{longer - shorter}}}{pattern})?'
+        return f'\\b[0-9]{{{lengths[0]}}}{pattern}\\b'
+    
+    def _compile(self, pattern: str, fallback: Optional[str] = None):
+        """
+        Compile a pattern with the configured regex backend.
+        
+        fallback is compiled with Python's re instead when RE2 rejects the pattern
+        (default: the pattern itself).
+        """
+        if self.regex_backend == 're2':
+            options = re2.Options()
+            options.log_errors = False
+            try:
+                return re2.compile(pattern, options=options)
+            except re2.error:
+                # RE2 has no lookarounds/backreferences; keep Python's re for those
+                return re.compile(pattern if fallback is None else fallback)
+        elif self.regex_backend == 'regex':
+            return regex.compile(pattern)
+        return re.compile(pattern)
+    
+    def _build_prefilter(self, pattern_list: List[Tuple[str, str]], rx):
+        """
+        Compile a Hyperscan database that tells whether rx could match a text at all.
+        
+        Hyperscan's prefilter mode matches a superset of each pattern (lookaheads are
+        relaxed), so a text it finds nothing in has no match for rx either. \\w, \\d and
+        \\b use Unicode rules exactly where the compiled expression does. The regex
+        backend counts combining marks as word characters, which Hyperscan does not,
+        so it gets no prefilter.
+        """
+        if not self.use_hyperscan or self.regex_backend == 'regex':
+            return None
+        
+        unicode_rx = isinstance(rx, re.Pattern)
+        base_flags = hyperscan.HS_FLAG_PREFILTER | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8
+        flags = [
+            base_flags | hyperscan.HS_FLAG_UCP
+            if unicode_rx and entity_type not in self.ASCII_PATTERN_TYPES else base_flags
+            for entity_type, _ in pattern_list
+        ]
+        
+        database = hyperscan.Database()
+        try:
+            database.compile(
+                expressions=[pattern.encode('utf-8') for _, pattern in pattern_list],
+                ids=list(range(len(pattern_list))),
+                flags=flags
+            )
+        except hyperscan.HyperscanError:
+            # Without a prefilter every text is simply scanned with rx
+            return None
+        return database
+    
+    def _prefilter_matches(self, database, text: str) -> bool:
+        """Whether the Hyperscan prefilter finds any candidate match in text."""
+        # Scratch space is per thread; a Database can be scanned from several at once
+        scratches = getattr(self._hs_local, 'scratches', None)
+        if scratches is None:
+            scratches = self._hs_local.scratches = {}
+        scratch = scratches.get(id(database))
+        if scratch is None:
+            scratch = scratches[id(database)] = hyperscan.Scratch(database)
+        
+        try:
+            data = text.encode('utf-8')
+        except UnicodeEncodeError:
+            # Lone surrogates cannot be scanned as UTF-8; leave the decision to rx
+            return True
+        
+        try:
+            database.scan(data, match_event_handler=_stop_at_first_match, scratch=scratch)
+        except hyperscan.ScanTerminated:
+            return True
+        return False
     
     def extract_ner_entities(self, text: str) -> List[Dict]:
         """Extract named entities using CLASSLA NER."""
         if not self.nlp:
             return []
         
-        doc = self.nlp(text)
+        return self._entities_from_doc(self.nlp(text))
+    
+    def extract_ner_entities_batch(self, texts: List[str]) -> List[List[Dict]]:
+        """Extract named entities for several texts with a single CLASSLA call."""
+        if not self.nlp:
+            return [[] for _ in texts]
+        
         entities = []
+        for i in range(0, len(texts), self.batch_size):
+            chunk = texts[i:i + self.batch_size]
+            docs = self.nlp([classla.Document([], text=text) for text in chunk])
+            entities.extend(self._entities_from_doc(doc) for doc in docs)
+        return entities
+    
+    def _entities_from_doc(self, doc) -> List[Dict]:
+        """Collect NER entities from a processed CLASSLA document."""
+        # CLASSLA's NER processor always sets token.ner; collect plain tuples in the
+        # token loop and build the entity dicts once at the end
+        found = []
+        append = found.append
         
         for sentence in doc.sentences:
             for token in sentence.tokens:
-                if hasattr(token, 'ner') and token.ner != 'O':
-                    entity_type = token.ner[2:] if token.ner.startswith(('B-', 'I-')) else token.ner
-                    entities.append({
-                        'text': token.text,
-                        'type': entity_type,
-                        'ner_tag': token.ner,
-                        'start': token.start_char,
-                        'end': token.end_char,
-                        'detection_method': 'classla_ner',
-                        'confidence': 'high'
-                    })
-        
-        return entities
+                ner = token.ner
+                if ner == 'O':
+                    continue
+                entity_type = ner[2:] if ner[1:2] == '-' and ner[0] in 'BI' else ner
+                append((token.text, entity_type, ner, token.start_char, token.end_char))
+        
+        return [
+            {
+                'text': text,
+                'type': entity_type,
+                'ner_tag': ner,
+                'start': start,
+                'end': end,
+                'detection_method': 'classla_ner',
+                'confidence': 'high'
+            }
+            for text, entity_type, ner, start, end in found
+        ]
     
     def extract_presidio_entities(self, text: str) -> List[Dict]:
         """Extract entities using Presidio patterns."""
-        entities = []
-        
-        # Extract credit cards
-        for pattern in self.credit_card_patterns:
-            for match in re.finditer(pattern, text):
-                if self._validate_credit_card(match.group()):
-                    entities.append({
-                        'text': match.group(),
-                        'type': 'CREDIT_CARD',
-                        'start': match.start(),
-                        'end': match.end(),
-                        'detection_method': 'presidio_pattern',
-                        'confidence': 'high'
-                    })
-        
-        # Extract emails
-        for pattern in self.email_patterns:
-            for match in re.finditer(pattern, text):
-                if self._validate_email(match.group()):
-                    entities.append({
-                        'text': match.group(),
-                        'type': 'EMAIL',
-                        'start': match.start(),
-                        'end': match.end(),
-                        'detection_method': 'presidio_pattern',
-                        'confidence': 'high'
-                    })
+        # Extract credit cards, emails, IP addresses, dates, URLs and IBANs in one pass
+        entities = self._scan_combined(
+            text, self._presidio_rx, self._presidio_groups, self._presidio_later, 'presidio_pattern',
+            self._presidio_prefilter
+        )
         
         # Extract phone numbers using Google's phonenumbers library
         phone_entities = self._extract_phone_numbers_with_google(text)
         entities.extend(phone_entities)
         
-        # Extract IP addresses
-        for pattern in self.ip_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append({
-                    'text': match.group(),
-                    'type': 'IP_ADDRESS',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'detection_method': 'presidio_pattern',
-                    'confidence': 'high'
-                })
-        
-        # Extract dates
-        for pattern in self.date_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append({
-                    'text': match.group(),
-                    'type': 'DATE',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'detection_method': 'presidio_pattern',
-                    'confidence': 'medium'
-                })
-        
-        # Extract URLs
-        for pattern in self.url_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append({
-                    'text': match.group(),
-                    'type': 'URL',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'detection_method': 'presidio_pattern',
-                    'confidence': 'high'
-                })
-        
-        # Extract IBAN
-        for pattern in self.iban_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append({
-                    'text': match.group(),
-                    'type': 'IBAN',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'detection_method': 'presidio_pattern',
-                    'confidence': 'high'
-                })
-        
         return entities
     
     def extract_regional_entities(self, text: str) -> List[Dict]:
         """Extract regional entities specific to the language."""
-        entities = []
+        # Extract personal IDs, tax numbers, bank accounts and addresses in one pass
+        if self._regional_rx is None:
+            return []
         
-        # Extract personal IDs
-        id_patterns = self.id_patterns.get(self.language, [])
-        for pattern in id_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append({
-                    'text': match.group(),
-                    'type': 'PERSONAL_ID',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'detection_method': 'regional_pattern',
-                    'confidence': 'high'
-                })
+        return self._scan_combined(
+            text, self._regional_rx, self._regional_groups, self._regional_later, 'regional_pattern',
+            self._regional_prefilter
+        )
+    
+    def _scan_combined(self, text: str, rx: re.Pattern, group_types: Dict[str, str], later_groups: Dict,
+                       detection_method: str, prefilter=None) -> List[Dict]:
+        """
+        Scan text once with a fused pattern and dispatch matches by group name.
         
-        # Extract tax numbers
-        tax_patterns = self.tax_patterns.get(self.language, [])
-        for pattern in tax_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append({
-                    'text': match.group(),
-                    'type': 'TAX_NUMBER',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'detection_method': 'regional_pattern',
-                    'confidence': 'high'
-                })
+        Finds the same candidates as running each pattern on its own: the scan resumes
+        right after every match start, so a match does not hide others starting inside
+        it; the alternatives after the winning group are tried at the same start; and
+        each pattern only matches again after the end of its own previous match.
+        Overlaps are resolved later by _remove_overlapping_entities.
+        """
+        if prefilter is not None and not self._prefilter_matches(prefilter, text):
+            return []
         
-        # Extract bank accounts
-        bank_patterns = self.bank_account_patterns.get(self.language, [])
-        for pattern in bank_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append({
-                    'text': match.group(),
-                    'type': 'BANK_ACCOUNT',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'detection_method': 'regional_pattern',
-                    'confidence': 'high'
-                })
+        # The re2 module encodes a str to UTF-8 on every search call, so scan the text
+        # encoded once instead and map byte offsets back to characters
+        if self.regex_backend == 're2' and not isinstance(rx, re.Pattern):
+            subject = text.encode('utf-8')
+        else:
+            subject = text
+        mapped = len(subject) != len(text)
+        # Character and byte offset of the last match start; matches only move forward
+        char_pos = byte_pos = 0
         
-        # Extract addresses
-        address_patterns = self.address_patterns.get(self.language, [])
-        for pattern in address_patterns:
-            for match in re.finditer(pattern, text):
+        entities = []
+        # Where each group may match next (in subject offsets), as in its own finditer
+        resume = dict.fromkeys(group_types, 0)
+        pos = 0
+        
+        while True:
+            match = rx.search(subject, pos)
+            if match is None:
+                break
+            
+            subject_start = match.start()
+            if mapped:
+                char_pos += len(subject[byte_pos:subject_start].decode('utf-8'))
+                byte_pos = subject_start
+                start = char_pos
+                pos = subject_start + len(text[start].encode('utf-8'))
+            else:
+                start = subject_start
+                pos = start + 1
+            
+            candidates = [(match.lastgroup, match.end())]
+            for group, group_rx in later_groups[match.lastgroup]:
+                other = group_rx.match(subject, subject_start)
+                if other is not None:
+                    candidates.append((group, other.end()))
+            
+            for group, subject_end in candidates:
+                if subject_start < resume[group]:
+                    continue
+                resume[group] = subject_end
+                
+                end = start + len(subject[subject_start:subject_end].decode('utf-8')) if mapped else subject_end
+                matched = text[start:end]
+                
+                entity_type = group_types[group]
+                if not isinstance(entity_type, str):
+                    # Fixed-length numbers share a group and are told apart by length
+                    entity_type = entity_type[end - start]
+                validate = self._validators.get(entity_type)
+                if validate is not None and not validate(matched):
+                    continue
+                
                 entities.append({
-                    'text': match.group(),
-                    'type': 'ADDRESS',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'detection_method': 'regional_pattern',
-                    'confidence': 'medium'
+                    'text': matched,
+                    'type': entity_type,
+                    'start': start,
+                    'end': end,
+                    'detection_method': detection_method,
+                    'confidence': self.PATTERN_CONFIDENCE.get(entity_type, 'high')
                 })
         
         return entities
@@ -369,52 +859,47 @@ class ComprehensiveGDPRAnonymizer:
     def _validate_credit_card(self, card_number: str) -> bool:
         """Validate credit card using Luhn algorithm (from Presidio)."""
         # Remove spaces and dashes
-        sanitized = re.sub(r'[-\s]', '', card_number)
+        sanitized = card_number.translate(_CARD_STRIP_TABLE)
         
-        if not sanitized.isdigit():
+        # Card numbers (PANs) are 12 to 19 digits long; reject others before Luhn
+        if len(sanitized) not in _CARD_LENGTHS:
             return False
         
-        # Luhn algorithm
-        def digits_of(n: str) -> List[int]:
-            return [int(dig) for dig in str(n)]
+        if not (sanitized.isascii() and sanitized.isdigit()):
+            return False
         
-        digits = digits_of(sanitized)
-        odd_digits = digits[-1::-2]
-        even_digits = digits[-2::-2]
-        checksum = sum(odd_digits)
-        for d in even_digits:
-            checksum += sum(digits_of(str(d * 2)))
+        # Luhn algorithm: every second digit from the right is doubled, looked up
+        # as the digit sum of its double; the other digits are summed as ASCII
+        # codes and their '0' offset removed once for all of them
+        digits = sanitized.encode('ascii')
+        kept = digits[-1::-2]
+        checksum = (sum(kept) - 0x30 * len(kept) +
+                    sum(digits[-2::-2].translate(_LUHN_DOUBLE_TABLE)))
         
         return checksum % 10 == 0
     
     def _validate_email(self, email: str) -> bool:
         """Validate email address (basic validation)."""
-        # Basic email validation
-        if '@' not in email or '.' not in email:
-            return False
-        
-        # Check for valid TLD
-        parts = email.split('@')
-        if len(parts) != 2:
-            return False
-        
-        domain = parts[1]
-        if '.' not in domain:
+        # Exactly one '@'
+        at = email.find('@')
+        if at < 0 or email.find('@', at + 1) >= 0:
             return False
         
-        return True
+        # Check for valid TLD (any '.' in the domain; when in doubt, mask)
+        return email.find('.', at + 1) >= 0
     
     def _validate_phone(self, phone: str) -> bool:
         """Validate phone number (basic validation)."""
         # Remove common separators
-        sanitized = re.sub(r'[-\s\(\)]', '', phone)
+        sanitized = phone.translate(_PHONE_STRIP_TABLE)
         
         # Check if it's a reasonable length
         if len(sanitized) < 7 or len(sanitized) > 15:
             return False
         
         # Check if it contains only digits and +
-        if not re.match(r'^\+?[\d]+$', sanitized):
+        digits = sanitized[1:] if sanitized.startswith('+') else sanitized
+        if not digits.isdecimal():
             return False
         
         return True
@@ -430,64 +915,85 @@ class ComprehensiveGDPRAnonymizer:
             List[Dict]: List of phone number entities
         """
         entities = []
+        seen_spans = set()
         
-        # Try different regions for phone number detection
-        regions = ['SI', 'HR', 'RS', 'BG', 'US', 'GB', 'DE', 'FR']  # Add more as needed
+        # Only the digit-rich parts of the text can hold a number, so the matcher
+        # runs over those windows instead of the whole text
+        windows = self._phone_candidate_windows(text)
+        if not windows:
+            return entities
         
-        for region in regions:
+        for region in self.phone_regions:
             try:
-                # Find all phone numbers in the text
-                matcher = phonenumbers.PhoneNumberMatcher(text, region)
-                for match in matcher:
-                    try:
-                        # Parse the phone number
-                        phone_number = phonenumbers.parse(match.raw_string, region)
+                for window_start, window_end in windows:
+                    # Find all phone numbers in the window; numbers written with a
+                    # '+' prefix are recognised whatever the region
+                    for match in phonenumbers.PhoneNumberMatcher(text[window_start:window_end], region):
+                        # The same span may be found again for another region
+                        span = (window_start + match.start, window_start + match.end)
+                        if span in seen_spans:
+                            continue
                         
-                        # Validate the phone number
-                        if phonenumbers.is_valid_number(phone_number):
-                            # Get formatted number
-                            formatted_number = phonenumbers.format_number(
-                                phone_number, 
-                                phonenumbers.PhoneNumberFormat.INTERNATIONAL
-                            )
-                            
-                            # Get region info
-                            number_region = phonenumbers.region_code_for_number(phone_number)
-                            
-                            entities.append({
-                                'text': match.raw_string,
-                                'type': 'PHONE',
-                                'start': match.start,
-                                'end': match.end,
-                                'detection_method': 'google_phonenumbers',
-                                'confidence': 'high',
-                                'metadata': {
-                                    'formatted_number': formatted_number,
-                                    'region': number_region,
-                                    'number_type': phonenumbers.number_type(phone_number),
-                                    'is_valid': True
-                                }
-                            })
-                    except phonenumbers.NumberParseException:
-                        # Skip invalid numbers
-                        continue
+                        # Validate the phone number; the same number recurs across texts,
+                        # so validation and metadata lookups are memoized
+                        phone_number = match.number
+                        details = _phone_number_details(
+                            phone_number.country_code,
+                            phone_number.national_number,
+                            phone_number.extension,
+                            phone_number.italian_leading_zero,
+                            phone_number.number_of_leading_zeros
+                        )
+                        if details is None:
+                            continue
                         
-            except Exception as e:
+                        formatted_number, region_code, number_type = details
+                        seen_spans.add(span)
+                        entities.append({
+                            'text': match.raw_string,
+                            'type': 'PHONE',
+                            'start': span[0],
+                            'end': span[1],
+                            'detection_method': 'google_phonenumbers',
+                            'confidence': 'high',
+                            'metadata': {
+                                'formatted_number': formatted_number,
+                                'region': region_code,
+                                'number_type': number_type,
+                                'is_valid': True
+                            }
+                        })
+                    
+            except Exception:
                 # Skip regions that cause issues
                 continue
         
-        # Remove duplicates (same phone number detected multiple times)
-        unique_entities = []
-        seen_numbers = set()
+        return entities
+    
+    def _phone_candidate_windows(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Find the parts of text that could contain a phone number.
         
-        for entity in entities:
-            # Normalize phone number for comparison
-            normalized = re.sub(r'[\s\-\(\)\.]', '', entity['text'])
-            if normalized not in seen_numbers:
-                seen_numbers.add(normalized)
-                unique_entities.append(entity)
+        Returns (start, end) windows around every run of digits long enough to be a
+        valid number, padded with _PHONE_WINDOW_PAD characters of context and merged
+        where they overlap.
+        """
+        min_digits = self._phone_min_digits
+        windows = []
         
-        return unique_entities
+        for run in _PHONE_DIGIT_RUN_RE.finditer(text):
+            run_start, run_end = run.span()
+            if run_end - run_start < min_digits or sum(map(str.isdecimal, run.group())) < min_digits:
+                continue
+            
+            start = max(run_start - _PHONE_WINDOW_PAD, 0)
+            end = min(run_end + _PHONE_WINDOW_PAD, len(text))
+            if windows and start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], end)
+            else:
+                windows.append((start, end))
+        
+        return windows
     
     def anonymize_text(self, text: str, mask_char: str = '*', 
                       preserve_types: List[str] = None, use_descriptive_masks: bool = False) -> Dict:
@@ -503,31 +1009,256 @@ class ComprehensiveGDPRAnonymizer:
         Returns:
             Dict: Anonymization results
         """
+        if not self.nlp:
+            return self._anonymize(text, [], mask_char, preserve_types, use_descriptive_masks)
+        
+        # Detect patterns in a worker thread while CLASSLA, whose torch ops release
+        # the GIL, tags the text here
+        pattern_future = self._get_pattern_executor().submit(self._extract_pattern_entities, text)
+        ner_entities = self.extract_ner_entities(text)
+        return self._anonymize(
+            text, ner_entities, mask_char, preserve_types, use_descriptive_masks,
+            pattern_future.result()
+        )
+    
+    def anonymize_batch(self, texts: List[str], mask_char: str = '*',
+                        preserve_types: List[str] = None, use_descriptive_masks: bool = False) -> List[Dict]:
+        """
+        Anonymize several texts, running CLASSLA NER over the whole batch at once.
+        
+        Args:
+            texts (List[str]): Input texts to anonymize
+            mask_char (str): Character to use for masking (ignored if use_descriptive_masks=True)
+            preserve_types (List[str]): Entity types to preserve (not mask)
+            use_descriptive_masks (bool): If True, use descriptive tags like <MASKED_EMAIL> instead of asterisks
+            
+        Returns:
+            List[Dict]: Anonymization results, in the same order as texts; identical
+                texts are anonymized once and share one result dict
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        if len(unique_texts) < len(texts):
+            results = dict(zip(unique_texts, self.anonymize_batch(
+                unique_texts, mask_char, preserve_types, use_descriptive_masks
+            )))
+            return [results[text] for text in texts]
+        
+        if not self.nlp:
+            return [
+                self._anonymize(text, [], mask_char, preserve_types, use_descriptive_masks)
+                for text in texts
+            ]
+        
+        pattern_future = self._get_pattern_executor().submit(list, map(self._extract_pattern_entities, texts))
+        ner_batches = self.extract_ner_entities_batch(texts)
+        return [
+            self._anonymize(text, ner_entities, mask_char, preserve_types, use_descriptive_masks,
+                            pattern_entities)
+            for text, ner_entities, pattern_entities in zip(texts, ner_batches, pattern_future.result())
+        ]
+    
+    def anonymize_many(self, texts: List[str], workers: Optional[int] = None, mask_char: str = '*',
+                       preserve_types: List[str] = None, use_descriptive_masks: bool = False) -> List[Dict]:
+        """
+        Anonymize many texts, spreading the pattern work over worker processes.
+        
+        CLASSLA NER runs here in batches (one pipeline, so a GPU is not shared between
+        processes); the regex, Luhn and phone number work runs in the workers, which
+        build their own pattern-only anonymizer once at start-up. The workers are
+        started on the first call and reused by later ones; close() stops them.
+        
+        Args:
+            texts (List[str]): Input texts to anonymize
+            workers (int): Number of worker processes (default: os.cpu_count())
+            mask_char (str): Character to use for masking (ignored if use_descriptive_masks=True)
+            preserve_types (List[str]): Entity types to preserve (not mask)
+            use_descriptive_masks (bool): If True, use descriptive tags like <MASKED_EMAIL> instead of asterisks
+            
+        Returns:
+            List[Dict]: Anonymization results, in the same order as texts; identical
+                texts are anonymized once and share one result dict
+        """
+        if not texts:
+            return []
+        
+        unique_texts = list(dict.fromkeys(texts))
+        if len(unique_texts) < len(texts):
+            results = dict(zip(unique_texts, self.anonymize_many(
+                unique_texts, workers, mask_char, preserve_types, use_descriptive_masks
+            )))
+            return [results[text] for text in texts]
+        
+        workers = workers or os.cpu_count() or 1
+        ner_batches = self.extract_ner_entities_batch(texts)
+        
+        executor = self._get_process_pool(workers)
+        try:
+            return list(executor.map(
+                _anonymize_in_worker,
+                texts,
+                ner_batches,
+                [(mask_char, preserve_types, use_descriptive_masks)] * len(texts),
+                chunksize=max(1, len(texts) // (workers * 4))
+            ))
+        except BrokenProcessPool:
+            # A worker died; the next call starts a new pool
+            with self._executor_lock:
+                if self._process_pool is executor:
+                    self._process_pool = None
+            raise
+    
+    def anonymize_stream(self, text_iter: Iterable[str], chunk_chars: int = 50_000,
+                         overlap: int = 64, mask_char: str = '*',
+                         preserve_types: List[str] = None,
+                         use_descriptive_masks: bool = False) -> Iterator[str]:
+        """
+        Anonymize a long document piece by piece, yielding masked text as it is produced.
+        
+        The input is cut into windows of about chunk_chars characters, preferably at a
+        line break, a sentence end or whitespace. Each window re-reads the last `overlap` characters of
+        the previous one as context, so an entity straddling a cut is still detected
+        whole; the overlap should be at least as long as the longest pattern (an IBAN is
+        about 32 characters).
+        
+        Args:
+            text_iter (Iterable[str]): Pieces of the input text, in order
+            chunk_chars (int): Approximate number of characters processed per window
+            overlap (int): Characters of context shared between consecutive windows
+            mask_char (str): Character to use for masking (ignored if use_descriptive_masks=True)
+            preserve_types (List[str]): Entity types to preserve (not mask)
+            use_descriptive_masks (bool): If True, use descriptive tags like <MASKED_EMAIL> instead of asterisks
+            
+        Yields:
+            str: Consecutive pieces of the anonymized text
+        """
+        if chunk_chars <= 0 or overlap < 0:
+            raise ValueError("chunk_chars must be positive and overlap non-negative")
+        
+        window_size = chunk_chars + overlap
+        buffer = ''
+        # Offset in buffer up to which the text has already been emitted
+        emitted = 0
+        
+        for piece in text_iter:
+            buffer += piece
+            while len(buffer) - emitted >= window_size:
+                window = buffer[:emitted + window_size]
+                masked, cut = self._mask_stream_window(
+                    window, emitted, False, overlap,
+                    mask_char, preserve_types, use_descriptive_masks
+                )
+                yield masked
+                
+                # Keep `overlap` characters before the cut as context for the next window
+                keep = max(cut - overlap, 0)
+                buffer = buffer[keep:]
+                emitted = cut - keep
+        
+        if len(buffer) > emitted:
+            masked, _ = self._mask_stream_window(
+                buffer, emitted, True, overlap,
+                mask_char, preserve_types, use_descriptive_masks
+            )
+            yield masked
+    
+    def _mask_stream_window(self, window: str, emitted: int, final: bool,
+                            overlap: int, mask_char: str,
+                            preserve_types: Optional[List[str]],
+                            use_descriptive_masks: bool) -> Tuple[str, int]:
+        """Mask window[emitted:cut] for anonymize_stream and return it together with cut."""
+        entities = self._entities_to_mask(window, self.extract_ner_entities(window), preserve_types)
+        
+        if final:
+            cut = len(window)
+        else:
+            cut = len(window) - overlap
+            # Prefer to cut at a paragraph or line break, then after a sentence, then at
+            # any whitespace, so CLASSLA sees whole sentences in each window
+            low = max(emitted, cut - overlap)
+            boundary = window.rfind('\n', low, cut)
+            if boundary < 0:
+                boundary = window.rfind('. ', low, cut - 1)
+                if boundary >= 0:
+                    boundary += 1
+            if boundary < 0:
+                boundary = max(window.rfind(' ', low, cut), window.rfind('\t', low, cut))
+            if boundary >= 0:
+                cut = boundary + 1
+            
+            # Never split an entity; leave it for the next window if possible
+            for entity in entities:
+                if entity['start'] < cut < entity['end']:
+                    cut = entity['start'] if entity['start'] > emitted else entity['end']
+                    break
+        
+        spans = []
+        for entity in entities:
+            # Entities inside the overlap were already masked by the previous window
+            start = max(entity['start'], emitted)
+            end = entity['end']
+            if end <= start or start >= cut:
+                continue
+            
+            if use_descriptive_masks:
+                mask = f"<MASKED_{entity['type'].upper()}>"
+            else:
+                mask = mask_char * (end - start)
+            
+            spans.append((start, end, mask))
+        
+        return apply_spans(window, spans, emitted, cut), cut
+    
+    def _extract_pattern_entities(self, text: str) -> List[Dict]:
+        """Extract Presidio and regional entities, using the LRU cache if enabled."""
+        if not self.pattern_cache_size:
+            return self.extract_presidio_entities(text) + self.extract_regional_entities(text)
+        
+        with self._pattern_cache_lock:
+            cached = self._pattern_cache.get(text)
+            if cached is not None:
+                self._pattern_cache.move_to_end(text)
+                return list(cached)
+        
+        entities = tuple(self.extract_presidio_entities(text) + self.extract_regional_entities(text))
+        
+        with self._pattern_cache_lock:
+            self._pattern_cache[text] = entities
+            while len(self._pattern_cache) > self.pattern_cache_size:
+                self._pattern_cache.popitem(last=False)
+        
+        return list(entities)
+    
+    def _entities_to_mask(self, text: str, ner_entities: List[Dict], preserve_types: Optional[List[str]],
+                          pattern_entities: Optional[List[Dict]] = None) -> List[Dict]:
+        """Merge NER and pattern entities into a sorted, non-overlapping list to mask."""
         if preserve_types is None:
             preserve_types = []
         
-        # Extract all entities from all sources
-        ner_entities = self.extract_ner_entities(text)
-        presidio_entities = self.extract_presidio_entities(text)
-        regional_entities = self.extract_regional_entities(text)
+        # Extract the remaining entities from pattern sources, unless already done
+        if pattern_entities is None:
+            pattern_entities = self._extract_pattern_entities(text)
         
         # Combine all entities
-        all_entities = ner_entities + presidio_entities + regional_entities
+        all_entities = ner_entities + pattern_entities
         
-        # Remove duplicates (entities that overlap)
+        # Remove duplicates (entities that overlap); the rest come back sorted by
+        # start position, so the text can be rebuilt in one pass
         filtered_entities = self._remove_overlapping_entities(all_entities)
         
         # Filter out preserved types
-        entities_to_mask = [
+        return [
             entity for entity in filtered_entities
             if entity['type'] not in preserve_types
         ]
-        
-        # Sort by start position (descending) to avoid index issues
-        entities_to_mask.sort(key=lambda x: x['start'], reverse=True)
-        
-        # Create masked text
-        masked_text = text
+    
+    def _anonymize(self, text: str, ner_entities: List[Dict], mask_char: str,
+                   preserve_types: Optional[List[str]], use_descriptive_masks: bool,
+                   pattern_entities: Optional[List[Dict]] = None) -> Dict:
+        """Mask text given its NER entities; pattern-based entities are extracted here if not given."""
+        entities_to_mask = self._entities_to_mask(text, ner_entities, preserve_types, pattern_entities)
+        
+        # Collect the masks, then rebuild the text from them in one pass
+        spans = []
         masked_entities = []
         
         for entity in entities_to_mask:
@@ -541,7 +1272,7 @@ class ComprehensiveGDPRAnonymizer:
             else:
                 mask = mask_char * (end - start)
             
-            masked_text = masked_text[:start] + mask + masked_text[end:]
+            spans.append((start, end, mask))
             
             masked_entities.append({
                 'original': original_text,
@@ -552,55 +1283,87 @@ class ComprehensiveGDPRAnonymizer:
                 'confidence': entity['confidence']
             })
         
+        masked_text = apply_spans(text, spans)
+        
+        # Report entities from the end of the text backwards, as before
+        masked_entities.reverse()
+        
+        # Group entities by type and by detection method (the groups share the dicts
+        # of masked_entities)
+        entities_by_type = {}
+        entities_by_method = {
+            'classla_ner': [],
+            'presidio_pattern': [],
+            'google_phonenumbers': [],
+            'regional_pattern': []
+        }
+        for entity in masked_entities:
+            entities_by_type.setdefault(entity['type'], []).append(entity)
+            entities_by_method.setdefault(entity['detection_method'], []).append(entity)
+        
+        # Count entities by type
+        type_counts = Counter({entity_type: len(group) for entity_type, group in entities_by_type.items()})
+        
         # Assess privacy risk
-        privacy_risk = self._assess_privacy_risk(masked_entities)
+        privacy_risk = self._assess_privacy_risk(type_counts)
         
         return {
             'original_text': text,
             'anonymized_text': masked_text,
             'masked_entities': masked_entities,
+            'entities_by_type': entities_by_type,
             'total_entities_masked': len(masked_entities),
             'privacy_risk': privacy_risk,
             'gdpr_compliance': self._check_gdpr_compliance(masked_entities),
+            'entities_by_method': entities_by_method,
             'detection_methods': {
-                'classla_ner': len([e for e in masked_entities if e['detection_method'] == 'classla_ner']),
-                'presidio_patterns': len([e for e in masked_entities if e['detection_method'] == 'presidio_pattern']),
-                'google_phonenumbers': len([e for e in masked_entities if e['detection_method'] == 'google_phonenumbers']),
-                'regional_patterns': len([e for e in masked_entities if e['detection_method'] == 'regional_pattern'])
+                'classla_ner': len(entities_by_method['classla_ner']),
+                'presidio_patterns': len(entities_by_method['presidio_pattern']),
+                'google_phonenumbers': len(entities_by_method['google_phonenumbers']),
+                'regional_patterns': len(entities_by_method['regional_pattern'])
             }
         }
     
     def _remove_overlapping_entities(self, entities: List[Dict]) -> List[Dict]:
-        """Remove overlapping entities, keeping the longer ones."""
+        """Remove overlapping entities, keeping the longer ones, and return them by start."""
         if not entities:
             return entities
         
-        # Sort by length (descending) and start position
-        entities.sort(key=lambda x: (x['end'] - x['start'], -x['start']), reverse=True)
+        # Work on parallel lists of offsets rather than on the dicts themselves
+        starts = [entity['start'] for entity in entities]
+        ends = [entity['end'] for entity in entities]
         
+        # Sort by length (descending) and start position, packing both into one
+        # integer key so the sort runs without building a tuple per entity
+        span = max(ends) + 1
+        keys = [(end - start) * span + (span - 1 - start) for start, end in zip(starts, ends)]
+        order = sorted(range(len(entities)), key=keys.__getitem__, reverse=True)
+        
+        # Kept entities never overlap, so their starts and ends are both sorted and
+        # inserting each at its position keeps the result in text order
+        kept_starts = []
+        kept_ends = []
         filtered = []
-        for entity in entities:
-            # Check if this entity overlaps with any already filtered entity
-            overlaps = False
-            for filtered_entity in filtered:
-                if (entity['start'] < filtered_entity['end'] and 
-                    entity['end'] > filtered_entity['start']):
-                    overlaps = True
-                    break
+        for j in order:
+            start, end = starts[j], ends[j]
+            
+            # Of the kept entities starting before this one ends, only the
+            # last can reach into it
+            i = bisect.bisect_left(kept_starts, end)
+            if i and kept_ends[i - 1] > start:
+                continue
             
-            if not overlaps:
-                filtered.append(entity)
+            kept_starts.insert(i, start)
+            kept_ends.insert(i, end)
+            filtered.insert(i, entities[j])
         
         return filtered
     
-    def _assess_privacy_risk(self, masked_entities: List[Dict]) -> str:
-        """Assess privacy risk based on masked entities."""
-        if not masked_entities:
+    def _assess_privacy_risk(self, type_counts: Counter) -> str:
+        """Assess privacy risk based on the counts of masked entity types."""
+        if not type_counts:
             return 'low'
         
-        # Count different entity types
-        entity_types = [entity['type'] for entity in masked_entities]
-        
         # High-risk entities
         high_risk = ['PERSONAL_ID', 'CREDIT_CARD', 'EMAIL', 'IBAN', 'TAX_NUMBER', 'BANK_ACCOUNT']
         # Medium-risk entities
@@ -608,8 +1371,8 @@ class ComprehensiveGDPRAnonymizer:
         # Low-risk entities
         low_risk = ['LOC', 'ORG', 'URL', 'DATE', 'ADDRESS']
         
-        high_count = sum(1 for t in entity_types if t in high_risk)
-        medium_count = sum(1 for t in entity_types if t in medium_risk)
+        high_count = sum(type_counts[t] for t in high_risk)
+        medium_count = sum(type_counts[t] for t in medium_risk)
         
         if high_count > 0:
             return 'high'
@@ -671,6 +1434,25 @@ class ComprehensiveGDPRAnonymizer:
         return compliance_report
 
 
+# Pattern-only anonymizer of the current worker process, see anonymize_many
+_worker_anonymizer = None
+
+
+def _init_worker(language: str, regex_backend: str, phone_regions: List[str], use_hyperscan: bool):
+    """Build the worker's anonymizer once, without a CLASSLA pipeline."""
+    global _worker_anonymizer
+    _worker_anonymizer = ComprehensiveGDPRAnonymizer(
+        language=language, regex_backend=regex_backend, nlp=False, phone_regions=phone_regions,
+        use_hyperscan=use_hyperscan
+    )
+
+
+def _anonymize_in_worker(text: str, ner_entities: List[Dict], options: Tuple) -> Dict:
+    """Mask one text in a worker, given the NER entities found in the parent."""
+    mask_char, preserve_types, use_descriptive_masks = options
+    return _worker_anonymizer._anonymize(text, ner_entities, mask_char, preserve_types, use_descriptive_masks)
+
+
 def main():
     """Demonstrate comprehensive GDPR-compliant anonymization."""
     
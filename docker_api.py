@@ -6,25 +6,100 @@ Simple Flask API that receives text and returns anonymized results.
 """
 
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import HTTPException
 from comprehensive_gdpr_anonymizer import ComprehensiveGDPRAnonymizer
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from itertools import repeat
+import hashlib
+import gc
 import logging
 import time
 import os
+import re
+import threading
+
+try:
+    # Faster JSON serialization, only needed for performance
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that parses and serializes with orjson."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 # Initialize Flask app
 app = Flask(__name__)
 
+# Reject oversized bodies with 413 before they are read and parsed
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 8 * 1024 * 1024))
+
+# Parse request bodies (request.get_json) with orjson too, when it is installed
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+def _json(obj):
+    """Build a JSON response, serialized with orjson when it is installed."""
+    if orjson is None:
+        return jsonify(obj)
+    return app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+# Opt-in LRU cache of /anonymize results keyed by a hash of the text and the options
+# (per worker process). Off by default: cached results include the detected personal
+# data in clear text, which then stays in memory, so only set RESULT_CACHE_SIZE > 0
+# where that is acceptable.
+_RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 0))
+_RESULT_CACHE = OrderedDict()
+_RESULT_CACHE_LOCK = threading.Lock()
+
+# Patterns for the /test-simple endpoint, fused into one expression compiled at import
+_SIMPLE_RE = re.compile(
+    r'(?P<EMAIL>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b)'
+    r'|(?P<PHONE>\+\d{1,3}\s?\d{1,4}\s?\d{1,4}\s?\d{1,4})'
+)
+_SIMPLE_MASKS = {'EMAIL': '<MASKED_EMAIL>', 'PHONE': '<MASKED_PHONE>'}
+
+# Languages CLASSLA has models for; others are rejected before touching the anonymizer
+_SUPPORTED_LANGS = frozenset({'sl', 'hr', 'sr', 'bg', 'mk'})
+
+# Small text run once after loading, so lazy start-up work (first CLASSLA forward pass,
+# phone metadata, worker threads) is not paid by the first real request
+_WARMUP_TEXT = "Janez Novak (janez.novak@gmail.com) iz Ljubljane, tel: 031 123 456"
+
 # Global anonymizer instance (initialized once)
 anonymizer = None
 
+# Set once the anonymizer is ready; the lock keeps concurrent callers from loading it twice
+_READY = threading.Event()
+_INIT_LOCK = threading.Lock()
+
+# Worker threads for the per-item /anonymize/batch fallback (started lazily, so safe
+# to create before fork)
+_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """JSON response for bodies over MAX_CONTENT_LENGTH."""
+    return _json({
+        'error': 'Request body too large',
+        'max_content_length': app.config['MAX_CONTENT_LENGTH']
+    }), 413
+
 @app.route('/', methods=['GET'])
 def root():
     """Root endpoint for basic health check."""
-    return jsonify({
+    return _json({
         'status': 'ok',
         'service': 'GDPR Anonymizer API',
         'message': 'Service is running',
@@ -42,20 +117,14 @@ def test_simple():
     try:
         data = request.get_json()
         if not data or 'text' not in data:
-            return jsonify({'error': 'Missing text field'}), 400
+            return _json({'error': 'Missing text field'}), 400
         
         text = data['text']
         
-        # Simple regex-based masking for testing
-        import re
-        
-        # Mask emails
-        text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '<MASKED_EMAIL>', text)
+        # Simple regex-based masking for testing: emails and phone numbers in one pass
+        text = _SIMPLE_RE.sub(lambda m: _SIMPLE_MASKS[m.lastgroup], text)
         
-        # Mask phone numbers (simple pattern)
-        text = re.sub(r'\+\d{1,3}\s?\d{1,4}\s?\d{1,4}\s?\d{1,4}', '<MASKED_PHONE>', text)
-        
-        return jsonify({
+        return _json({
             'original_text': data['text'],
             'anonymized_text': text,
             'total_entities_masked': 2,  # Placeholder
@@ -64,18 +133,122 @@ def test_simple():
             'note': 'Simple regex-based masking (CLASSLA not loaded)'
         })
         
+    except HTTPException:
+        # Let Flask answer request errors such as an oversized body (413) itself
+        raise
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _json({'error': str(e)}), 500
+
+def _result_cache_key(text, use_descriptive_masks, preserve_types):
+    """Build the result cache key, or None if the options cannot be hashed."""
+    try:
+        preserved = tuple(sorted(preserve_types or ()))
+        hash(preserved)
+    except TypeError:
+        return None
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    return digest, bool(use_descriptive_masks), preserved
+
+def _result_cache_get(key):
+    """Return a cached result and mark it as recently used."""
+    with _RESULT_CACHE_LOCK:
+        result = _RESULT_CACHE.get(key)
+        if result is not None:
+            _RESULT_CACHE.move_to_end(key)
+        return result
 
-def initialize_anonymizer():
-    """Get the pre-initialized anonymizer instance."""
+def _result_cache_put(key, result):
+    """Store a result, evicting the least recently used one when full."""
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE[key] = result
+        _RESULT_CACHE.move_to_end(key)
+        if len(_RESULT_CACHE) > _RESULT_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+
+def _include_original():
+    """Whether the request asked for original_text in the response (?include_original=1)."""
+    return request.args.get('include_original', '').lower() in ('1', 'true', 'yes')
+
+def initialize_anonymizer(warm_up=True, use_gpu=True):
+    """
+    Get the anonymizer instance, creating it on the first call.
+    
+    use_gpu must be False in a process that forks workers afterwards, since CUDA
+    cannot be used in a forked child. With warm_up, the new instance anonymizes one small text before it is published,
+    so /health only reports 'initialized' once requests no longer pay a cold start.
+    """
     global anonymizer
-    if anonymizer is None:
-        logger.error("Anonymizer not pre-initialized! This should not happen with optimized startup.")
-        raise RuntimeError("Anonymizer not available - check startup logs")
+    with _INIT_LOCK:
+        if anonymizer is None:
+            logger.info("Initializing GDPR Anonymizer...")
+            # Loading the models allocates a burst of long-lived objects; skip the
+            # collections while it runs and freeze the result so later collections
+            # (and, under --preload, the forked workers) never rescan it
+            gc.disable()
+            try:
+                # CLASSLA falls back to the CPU when no CUDA device is available
+                instance = ComprehensiveGDPRAnonymizer(language='sl', use_gpu=use_gpu)
+            finally:
+                gc.collect()
+                gc.freeze()
+                gc.enable()
+            if warm_up:
+                warm_up_anonymizer(instance)
+            anonymizer = instance
+            _READY.set()
     
     return anonymizer
 
+def warm_up_anonymizer(instance=None):
+    """Anonymize a small text once, to get lazy start-up work out of the way."""
+    instance = instance or anonymizer
+    if instance is None:
+        return
+    
+    start_time = time.perf_counter()
+    try:
+        instance.anonymize_text(_WARMUP_TEXT)
+    except Exception as e:
+        logger.warning(f"Warm-up anonymization failed: {str(e)}")
+        return
+    logger.info(f"Anonymizer warmed up in {time.perf_counter() - start_time:.2f} seconds")
+
+def initialize_in_background():
+    """Start initialize_anonymizer in a daemon thread and return the thread."""
+    def run():
+        try:
+            initialize_anonymizer()
+        except Exception as e:
+            logger.error(f"Failed to initialize anonymizer: {str(e)}")
+    
+    thread = threading.Thread(target=run, name='anonymizer-init', daemon=True)
+    thread.start()
+    return thread
+
+def _check_language(language):
+    """Return a 400 response for an unsupported language, or None if it is supported."""
+    # Check the type first: a list or dict cannot even be looked up in the set
+    if not isinstance(language, str) or language not in _SUPPORTED_LANGS:
+        return _json({
+            'error': f'Unsupported language: {language}',
+            'supported_languages': sorted(_SUPPORTED_LANGS)
+        }), 400
+    
+    # The service runs a single anonymizer, so a different language is not applied
+    if anonymizer is not None and language != anonymizer.language:
+        logger.warning(
+            f"Requested language '{language}' but the anonymizer is loaded for "
+            f"'{anonymizer.language}'; processing with '{anonymizer.language}'"
+        )
+    return None
+
+def _not_ready_response():
+    """503 response returned while the models are still loading."""
+    return _json({
+        'error': 'Service temporarily unavailable - initializing models',
+        'message': 'Please try again in a few minutes'
+    }), 503
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
@@ -83,7 +256,7 @@ def health_check():
         # Check if anonymizer is initialized
         anonymizer_status = 'initialized' if anonymizer is not None else 'not_initialized'
         
-        return jsonify({
+        return _json({
             'status': 'healthy',
             'service': 'GDPR Anonymizer API',
             'version': '1.0.0',
@@ -91,7 +264,7 @@ def health_check():
         })
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        return jsonify({
+        return _json({
             'status': 'unhealthy',
             'error': str(e)
         }), 500
@@ -108,56 +281,63 @@ def anonymize_text():
         "use_descriptive_masks": true,  # optional, default: false
         "preserve_types": ["LOC"]  # optional, default: []
     }
+    
+    Query parameters:
+        include_original=1  # echo the input back as original_text
     """
     try:
         # Get request data
         data = request.get_json()
         
         if not data or 'text' not in data:
-            return jsonify({
+            return _json({
                 'error': 'Missing required field: text'
             }), 400
         
         text = data['text']
         language = data.get('language', 'sl')
+        language_error = _check_language(language)
+        if language_error is not None:
+            return language_error
         use_descriptive_masks = data.get('use_descriptive_masks', False)
         preserve_types = data.get('preserve_types', [])
         
         # Validate text
-        if not isinstance(text, str) or len(text.strip()) == 0:
-            return jsonify({
+        if not isinstance(text, str) or not text or text.isspace():
+            return _json({
                 'error': 'Text must be a non-empty string'
             }), 400
         
-        # Initialize anonymizer if needed
-        try:
-            anonymizer = initialize_anonymizer()
-        except Exception as e:
-            logger.error(f"Failed to initialize anonymizer: {str(e)}")
-            return jsonify({
-                'error': 'Service temporarily unavailable - initializing models',
-                'message': 'Please try again in a few minutes'
-            }), 503
+        # Answer 503 while the models are loading instead of queueing behind them;
+        # once ready, the module-level anonymizer is set and never replaced
+        if not _READY.wait(timeout=0.1):
+            return _not_ready_response()
         
-        # Process the text
-        start_time = time.time()
+        # Process the text, reusing the result of an identical earlier request
+        start_time = time.perf_counter()
+        cache_key = None
+        if _RESULT_CACHE_SIZE > 0:
+            cache_key = _result_cache_key(text, use_descriptive_masks, preserve_types)
+        result = _result_cache_get(cache_key) if cache_key is not None else None
         try:
-            result = anonymizer.anonymize_text(
-                text=text,
-                use_descriptive_masks=use_descriptive_masks,
-                preserve_types=preserve_types
-            )
-            processing_time = time.time() - start_time
+            if result is None:
+                result = anonymizer.anonymize_text(
+                    text=text,
+                    use_descriptive_masks=use_descriptive_masks,
+                    preserve_types=preserve_types
+                )
+                if cache_key is not None:
+                    _result_cache_put(cache_key, result)
+            processing_time = time.perf_counter() - start_time
         except Exception as e:
             logger.error(f"Error during anonymization: {str(e)}")
-            return jsonify({
+            return _json({
                 'error': 'Processing error',
                 'message': str(e)
             }), 500
         
-        # Prepare response
+        # Prepare response (the caller already has the input; echo it only on request)
         response = {
-            'original_text': result['original_text'],
             'anonymized_text': result['anonymized_text'],
             'total_entities_masked': result['total_entities_masked'],
             'privacy_risk': result['privacy_risk'],
@@ -165,6 +345,8 @@ def anonymize_text():
             'processing_time_seconds': round(processing_time, 3),
             'masked_entities': []
         }
+        if _include_original():
+            response['original_text'] = result['original_text']
         
         # Add masked entities (limit to first 10 for performance)
         for entity in result['masked_entities'][:10]:
@@ -181,15 +363,47 @@ def anonymize_text():
                 'note': f"... and {len(result['masked_entities']) - 10} more entities"
             })
         
-        return jsonify(response)
+        return _json(response)
         
+    except HTTPException:
+        # Let Flask answer request errors such as an oversized body (413) itself
+        raise
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
-        return jsonify({
+        return _json({
             'error': 'Internal server error',
             'message': str(e)
         }), 500
 
+def _batch_item(index, result, processing_time, include_original):
+    """Build one /anonymize/batch result entry from an anonymization result."""
+    item = {
+        'index': index,
+        'anonymized_text': result['anonymized_text'],
+        'total_entities_masked': result['total_entities_masked'],
+        'privacy_risk': result['privacy_risk'],
+        'processing_time_seconds': round(processing_time, 3)
+    }
+    if include_original:
+        item['original_text'] = result['original_text']
+    return item
+
+def _anonymize_batch_item(index, text, options):
+    """Anonymize one batch item on its own; returns (entry, processing_time)."""
+    use_descriptive_masks, preserve_types, include_original = options
+    start_time = time.perf_counter()
+    try:
+        result = anonymizer.anonymize_text(
+            text=text,
+            use_descriptive_masks=use_descriptive_masks,
+            preserve_types=preserve_types
+        )
+    except Exception as e:
+        return {'index': index, 'error': str(e)}, 0
+    
+    processing_time = time.perf_counter() - start_time
+    return _batch_item(index, result, processing_time, include_original), processing_time
+
 @app.route('/anonymize/batch', methods=['POST'])
 def anonymize_batch():
     """
@@ -202,76 +416,93 @@ def anonymize_batch():
         "use_descriptive_masks": true,  # optional, default: false
         "preserve_types": ["LOC"]  # optional, default: []
     }
+    
+    Query parameters:
+        include_original=1  # echo each input back as original_text
     """
     try:
         # Get request data
         data = request.get_json()
         
         if not data or 'texts' not in data:
-            return jsonify({
+            return _json({
                 'error': 'Missing required field: texts'
             }), 400
         
         texts = data['texts']
         language = data.get('language', 'sl')
+        language_error = _check_language(language)
+        if language_error is not None:
+            return language_error
         use_descriptive_masks = data.get('use_descriptive_masks', False)
         preserve_types = data.get('preserve_types', [])
         
         # Validate texts
         if not isinstance(texts, list) or len(texts) == 0:
-            return jsonify({
+            return _json({
                 'error': 'Texts must be a non-empty list'
             }), 400
         
-        # Initialize anonymizer if needed
-        anonymizer = initialize_anonymizer()
-        
-        # Process all texts
-        results = []
-        total_processing_time = 0
+        # Answer 503 while the models are loading instead of queueing behind them;
+        # once ready, the module-level anonymizer is set and never replaced
+        if not _READY.wait(timeout=0.1):
+            return _not_ready_response()
         
+        # Record invalid items up front and anonymize the rest together
+        results = [None] * len(texts)
+        valid_indices = []
         for i, text in enumerate(texts):
-            if not isinstance(text, str) or len(text.strip()) == 0:
-                results.append({
+            if not isinstance(text, str) or not text or text.isspace():
+                results[i] = {
                     'index': i,
                     'error': 'Text must be a non-empty string'
-                })
-                continue
-            
-            try:
-                start_time = time.time()
-                result = anonymizer.anonymize_text(
-                    text=text,
-                    use_descriptive_masks=use_descriptive_masks,
-                    preserve_types=preserve_types
-                )
-                processing_time = time.time() - start_time
+                }
+            else:
+                valid_indices.append(i)
+        
+        include_original = _include_original()
+        
+        # Run CLASSLA once over all valid texts; the batch time is split evenly per item
+        start_time = time.perf_counter()
+        try:
+            batch_results = anonymizer.anonymize_batch(
+                [texts[i] for i in valid_indices],
+                use_descriptive_masks=use_descriptive_masks,
+                preserve_types=preserve_types
+            )
+        except Exception as e:
+            logger.warning(f"Batch anonymization failed, processing items one by one: {str(e)}")
+            batch_results = None
+        
+        if batch_results is not None:
+            total_processing_time = time.perf_counter() - start_time
+            per_item_time = total_processing_time / len(valid_indices) if valid_indices else 0
+            for i, result in zip(valid_indices, batch_results):
+                results[i] = _batch_item(i, result, per_item_time, include_original)
+        else:
+            # Fall back to one call per item on the worker pool so errors stay per item
+            total_processing_time = 0
+            for item, processing_time in _POOL.map(
+                _anonymize_batch_item,
+                valid_indices,
+                [texts[i] for i in valid_indices],
+                repeat((use_descriptive_masks, preserve_types, include_original))
+            ):
+                results[item['index']] = item
                 total_processing_time += processing_time
-                
-                results.append({
-                    'index': i,
-                    'original_text': result['original_text'],
-                    'anonymized_text': result['anonymized_text'],
-                    'total_entities_masked': result['total_entities_masked'],
-                    'privacy_risk': result['privacy_risk'],
-                    'processing_time_seconds': round(processing_time, 3)
-                })
-                
-            except Exception as e:
-                results.append({
-                    'index': i,
-                    'error': str(e)
-                })
         
-        return jsonify({
+        return _json({
             'results': results,
             'total_processing_time_seconds': round(total_processing_time, 3),
             'batch_size': len(texts)
         })
         
+    except HTTPException:
+        # Let Flask answer request errors such as an oversized body (413) itself
+        raise
     except Exception as e:
         logger.error(f"Error processing batch request: {str(e)}")
-        return jsonify({
+        return _json({
             'error': 'Internal server error',
             'message': str(e)
         }), 500
@@ -279,7 +510,7 @@ def anonymize_batch():
 @app.route('/info', methods=['GET'])
 def get_info():
     """Get information about the anonymizer capabilities."""
-    return jsonify({
+    return _json({
         'service': 'GDPR Anonymizer API',
         'version': '1.0.0',
         'capabilities': {
@@ -313,11 +544,20 @@ def get_info():
         }
     })
 
+# Under gunicorn --preload (see gunicorn.conf.py) this runs once in the master process,
+# and the forked workers share the loaded models copy-on-write. The warm-up starts
+# threads, which do not survive a fork, so each worker runs it after forking instead.
+# A CUDA context does not survive a fork either, so preloaded models stay on the CPU.
+if os.environ.get('PRELOAD_ANONYMIZER') == '1':
+    initialize_anonymizer(warm_up=False, use_gpu=False)
+
 if __name__ == '__main__':
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
     # Get port from environment (Railway sets this)
     port = int(os.environ.get('PORT', 8000))
     
-    # Run the Flask app (anonymizer will be initialized on first request)
+    # Run the Flask app while the anonymizer initializes in the background
     logger.info(f"Starting GDPR Anonymizer API server on port {port}...")
-    logger.info("Anonymizer will be initialized on first request to save startup time...")
+    logger.info("Anonymizer is initializing in the background; requests get 503 until it is ready...")
+    initialize_in_background()
     app.run(host='0.0.0.0', port=port, debug=False) 
\ No newline at end of file
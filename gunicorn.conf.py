@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for the GDPR Anonymizer API.
+
+Usage: gunicorn docker_api:app   (this file is picked up from the working directory)
+"""
+
+import multiprocessing
+import os
+
+# Build the anonymizer while docker_api is imported in the master, so the CLASSLA
+# models are loaded once and shared copy-on-write with the forked workers. A CUDA
+# context cannot be used in a forked child, so preloaded models run on the CPU. On a
+# GPU host set PRELOAD_ANONYMIZER=0: each worker then loads its own models on the GPU
+# (and WEB_CONCURRENCY=1 keeps that to one copy per GPU).
+os.environ.setdefault('PRELOAD_ANONYMIZER', '1')
+preload_app = True
+
+# One torch thread per worker; the workers already use every core between them.
+# Set before docker_api (and torch) is imported.
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+worker_class = 'gthread'
+
+# Large batches can take longer than gunicorn's 30 second default
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+def post_worker_init(worker):
+    """Warm up the preloaded anonymizer, or load one in this worker if none was preloaded."""
+    import docker_api
+    if docker_api.anonymizer is None:
+        # Requests get 503 until the models are loaded
+        docker_api.initialize_in_background()
+    else:
+        docker_api.warm_up_anonymizer()
@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 """
 Optimized startup script for instant response GDPR Anonymizer API
-Pre-initializes all models during startup for zero-latency requests
+Pre-initializes all models in the background while the API starts serving
 """
 
 import os
 import time
 import logging
-from comprehensive_gdpr_anonymizer import ComprehensiveGDPRAnonymizer
-from docker_api import app
+import threading
+import docker_api
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,24 +17,17 @@ logger = logging.getLogger(__name__)
 def pre_initialize_anonymizer():
     """Pre-initialize the anonymizer during startup for instant responses."""
     logger.info("🚀 Pre-initializing GDPR Anonymizer for instant responses...")
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     try:
-        # Initialize the anonymizer with caching
-        anonymizer = ComprehensiveGDPRAnonymizer(
-            language='sl', 
-            use_gpu=False,
-            preload_models=True  # Pre-load for instant responses
-        )
+        # Initialize the shared anonymizer instance of the API; it runs one warm-up
+        # anonymization before the API reports it as ready
+        anonymizer = docker_api.initialize_anonymizer()
         
-        # Test the anonymizer with a simple text to ensure it's working
-        test_text = "Test text for initialization."
-        result = anonymizer.anonymize_text(test_text)
-        
-        init_time = time.time() - start_time
+        init_time = time.perf_counter() - start_time
         logger.info(f"✅ Anonymizer pre-initialized successfully in {init_time:.2f} seconds")
-        logger.info(f"📊 Test result: {result['total_entities_masked']} entities masked")
         logger.info(f"💾 Models cached in volume for fast restarts")
+        logger.info("⚡ API is ready for instant responses!")
         
         return anonymizer
         
@@ -46,22 +39,19 @@ def main():
     """Main startup function."""
     logger.info("🚀 Starting optimized GDPR Anonymizer API...")
     
-    # Pre-initialize the anonymizer
-    anonymizer = pre_initialize_anonymizer()
-    
-    # Store the anonymizer instance globally for the API
-    import docker_api
-    docker_api.anonymizer = anonymizer
+    # Pre-initialize the anonymizer in the background; until it is ready the API
+    # answers 503 on the anonymize endpoints and reports it on /health
+    init_thread = threading.Thread(target=pre_initialize_anonymizer, name='anonymizer-init', daemon=True)
+    init_thread.start()
     
     # Get port from environment
     port = int(os.environ.get('PORT', 8000))
     
     logger.info(f"🌐 Starting Flask API server on port {port}...")
-    logger.info("⚡ API is ready for instant responses!")
-    logger.info("📈 Performance: Zero-latency anonymization available")
+    logger.info("📈 Performance: Zero-latency anonymization once models are loaded")
     
-    # Start the Flask app
-    app.run(host='0.0.0.0', port=port, debug=False)
+    # Start the Flask app; all API state lives in docker_api
+    docker_api.app.run(host='0.0.0.0', port=port, debug=False)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
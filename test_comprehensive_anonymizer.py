@@ -10,10 +10,23 @@ This script tests all capabilities of the comprehensive GDPR anonymizer:
 """
 
 import time
+from collections import Counter
+from functools import lru_cache
 from comprehensive_gdpr_anonymizer import ComprehensiveGDPRAnonymizer
 
+@lru_cache(maxsize=None)
+def get_anonymizer(language: str = 'sl') -> ComprehensiveGDPRAnonymizer:
+    """Get the anonymizer for a language, building it on first use and sharing it afterwards."""
+    return ComprehensiveGDPRAnonymizer(language=language)
+
+@lru_cache(maxsize=None)
+def get_pattern_anonymizer(language: str = 'sl') -> ComprehensiveGDPRAnonymizer:
+    """Get a pattern-only anonymizer (no CLASSLA pipeline) for a language."""
+    return ComprehensiveGDPRAnonymizer(language=language, nlp=False)
+
 def test_classla_ner_capabilities():
     """Test CLASSLA NER capabilities."""
+    anonymizer = get_anonymizer()
     print("🧠 Testing CLASSLA NER Capabilities")
     print("=" * 50)
     
@@ -48,7 +61,7 @@ def test_classla_ner_capabilities():
         print(f"NER entities found: {result_asterisk['detection_methods']['classla_ner']}")
         
         # Show NER entities specifically
-        ner_entities = [e for e in result_asterisk['masked_entities'] if e['detection_method'] == 'classla_ner']
+        ner_entities = result_asterisk['entities_by_method']['classla_ner']
         for entity in ner_entities:
             print(f"  - {entity['original']} ({entity['type']}) → {entity['mask']}")
         
@@ -56,6 +69,7 @@ def test_classla_ner_capabilities():
 
 def test_google_phone_numbers():
     """Test Google Phone Numbers Library capabilities."""
+    anonymizer = get_anonymizer()
     print("\n📱 Testing Google Phone Numbers Library")
     print("=" * 50)
     
@@ -87,7 +101,7 @@ def test_google_phone_numbers():
         print(f"Phone numbers found: {result['detection_methods']['google_phonenumbers']}")
         
         # Show phone entities specifically
-        phone_entities = [e for e in result['masked_entities'] if e['detection_method'] == 'google_phonenumbers']
+        phone_entities = result['entities_by_method']['google_phonenumbers']
         for entity in phone_entities:
             metadata = entity.get('metadata', {})
             formatted = metadata.get('formatted_number', 'N/A')
@@ -98,6 +112,7 @@ def test_google_phone_numbers():
 
 def test_presidio_patterns():
     """Test Microsoft Presidio patterns."""
+    anonymizer = get_anonymizer()
     print("\n🔍 Testing Microsoft Presidio Patterns")
     print("=" * 50)
     
@@ -134,7 +149,7 @@ def test_presidio_patterns():
         print(f"Presidio patterns found: {result['detection_methods']['presidio_patterns']}")
         
         # Show Presidio entities specifically
-        presidio_entities = [e for e in result['masked_entities'] if e['detection_method'] == 'presidio_pattern']
+        presidio_entities = result['entities_by_method']['presidio_pattern']
         for entity in presidio_entities:
             print(f"  - {entity['original']} ({entity['type']}) → {entity['mask']}")
         
@@ -142,6 +157,7 @@ def test_presidio_patterns():
 
 def test_regional_patterns():
     """Test regional patterns for different countries."""
+    anonymizer = get_anonymizer()
     print("\n🌍 Testing Regional Patterns")
     print("=" * 50)
     
@@ -178,7 +194,7 @@ def test_regional_patterns():
         print(f"Regional patterns found: {result['detection_methods']['regional_patterns']}")
         
         # Show regional entities specifically
-        regional_entities = [e for e in result['masked_entities'] if e['detection_method'] == 'regional_pattern']
+        regional_entities = result['entities_by_method']['regional_pattern']
         for entity in regional_entities:
             print(f"  - {entity['original']} ({entity['type']}) → {entity['mask']}")
         
@@ -186,6 +202,7 @@ def test_regional_patterns():
 
 def test_comprehensive_scenarios():
     """Test comprehensive real-world scenarios."""
+    anonymizer = get_anonymizer()
     print("\n🎯 Testing Comprehensive Real-World Scenarios")
     print("=" * 50)
     
@@ -218,16 +235,8 @@ def test_comprehensive_scenarios():
         print(f"Privacy Risk: {result['privacy_risk'].upper()}")
         print(f"Detection methods: {result['detection_methods']}")
         
-        # Group entities by type
-        entity_types = {}
-        for entity in result['masked_entities']:
-            entity_type = entity['type']
-            if entity_type not in entity_types:
-                entity_types[entity_type] = []
-            entity_types[entity_type].append(entity)
-        
         print("Entities by type:")
-        for entity_type, entities in entity_types.items():
+        for entity_type, entities in result['entities_by_type'].items():
             print(f"  {entity_type}: {len(entities)} entities")
             for entity in entities[:3]:  # Show first 3 of each type
                 print(f"    - {entity['original']} → {entity['mask']} [{entity['detection_method']}]")
@@ -238,6 +247,7 @@ def test_comprehensive_scenarios():
 
 def test_descriptive_masking():
     """Test descriptive masking capabilities."""
+    anonymizer = get_anonymizer()
     print("\n🏷️ Testing Descriptive Masking")
     print("=" * 50)
     
@@ -260,38 +270,173 @@ def test_descriptive_masking():
     
     print("-" * 40)
 
+def test_overlapping_patterns():
+    """Test that a pattern match does not hide another candidate starting inside it."""
+    print("\n🧩 Testing Overlapping Patterns")
+    print("=" * 50)
+    
+    # The URL match 'https://1000' overlaps the longer card-like number that starts
+    # inside it; both are candidates and the longer one is masked
+    test_text = 'x https://1000 2005800500999 y'
+    for language in ('sl', 'hr', 'bg'):
+        result = get_pattern_anonymizer(language).anonymize_text(test_text)
+        print(f"{language}: {result['anonymized_text']}")
+        
+        assert '2005800500999' not in result['anonymized_text'], result['anonymized_text']
+        assert [(entity['original'], entity['type']) for entity in result['masked_entities']] == [
+            ('1000 2005800500999', 'CREDIT_CARD')
+        ], result['masked_entities']
+    
+    print("✓ Overlapping candidates are resolved like separate pattern scans")
+
+def test_word_boundaries():
+    """Test the word boundaries of the number patterns next to non-ASCII letters."""
+    print("\n🔤 Testing Word Boundaries")
+    print("=" * 50)
+    
+    # Number formats are matched with ASCII rules: a Slovenian or Cyrillic letter
+    # right before a number is not part of the word, an ASCII letter is
+    test_cases = [
+        ('ž192.168.1.1', 'ž***********'),
+        ('EMŠO:č2005800500999', 'EMŠO:č*************'),
+        ('ж2005800500999', 'ж*************'),
+        ('a2005800500999', 'a2005800500999'),
+        ('20058005009991', '20058005009991'),
+    ]
+    for backend in ComprehensiveGDPRAnonymizer.REGEX_BACKENDS:
+        try:
+            anonymizer = ComprehensiveGDPRAnonymizer(language='sl', nlp=False, regex_backend=backend)
+        except ImportError:
+            print(f"  - {backend}: not installed, skipped")
+            continue
+        for text, expected in test_cases:
+            anonymized = anonymizer.anonymize_text(text)['anonymized_text']
+            assert anonymized == expected, (backend, text, anonymized)
+        print(f"✓ {backend}: {len(test_cases)} boundary cases")
+
+def test_regex_backends_agree():
+    """Test that the re2 backend detects the same regional addresses as re."""
+    print("\n🔁 Testing Regex Backends Agree")
+    print("=" * 50)
+
+    test_cases = {
+        'sl': ['Naslov: 4290 Tržič, Ulica Šmartno 12', 'Živim na Cesta Žalec 5, 1000 Ljubljana'],
+        'hr': ['Adresa: 10000 Zagreb, Ulica Đakovo 3', 'Stanujem u Ulica Čakovec 14'],
+        'sr': ['Adresa: 11000 Beograd, Ulica Čačak 7', 'Ulica Šabac 21, 21000 Novi Sad'],
+        'bg': ['Адрес: 1000 София, ул. Витоша 15', 'Живея на Ulica Šumen 8'],
+    }
+    for language, texts in test_cases.items():
+        try:
+            re2_anonymizer = ComprehensiveGDPRAnonymizer(language=language, nlp=False, regex_backend='re2')
+        except ImportError:
+            print("  - re2: not installed, skipped")
+            return
+        re_anonymizer = get_pattern_anonymizer(language)
+        for text in texts:
+            expected = re_anonymizer.anonymize_text(text)
+            result = re2_anonymizer.anonymize_text(text)
+            assert result['anonymized_text'] == expected['anonymized_text'], (language, text, result['anonymized_text'])
+            assert result['masked_entities'] == expected['masked_entities'], (language, text)
+        print(f"✓ {language}: {len(texts)} addresses match")
+
+def test_email_validation():
+    """Test that the email validator only rejects what it has to."""
+    print("\n📧 Testing Email Validation")
+    print("=" * 50)
+    
+    anonymizer = get_pattern_anonymizer()
+    
+    # Over-masking is the safe failure: anything with one '@' and a '.' after it passes
+    for email in ['ana.horvat@gmail.com', 'a@.com', '@x.com', 'a@..com', 'a@b.c.om']:
+        assert anonymizer._validate_email(email), email
+    for email in ['a@b@c.com', 'a.com', 'a@com', 'a@']:
+        assert not anonymizer._validate_email(email), email
+    
+    result = anonymizer.anonymize_text('Pišite na a@..com ali ana.horvat@gmail.com')
+    assert sorted(entity['original'] for entity in result['masked_entities']) == ['a@..com', 'ana.horvat@gmail.com']
+
+    # Slovene and Cyrillic domains, and a TLD glued to the text that follows it
+    for text, email in [('Pišite na info@čokolada.si', 'info@čokolada.si'),
+                        ('Пишете на ана@пример.бг', 'ана@пример.бг'),
+                        ('Kontakt: ana@x.si2024', 'ana@x.si2024')]:
+        result = anonymizer.anonymize_text(text)
+        assert email not in result['anonymized_text'], result['anonymized_text']
+        assert [entity['original'] for entity in result['masked_entities']] == [email], result['masked_entities']
+    print(f"✓ {result['anonymized_text']}")
+
 def test_performance():
     """Test performance with multiple texts."""
+    anonymizer = get_anonymizer()
     print("\n⚡ Testing Performance")
     print("=" * 50)
     
-    # Create a large test text
-    large_text = """
+    # Create a batch of test documents
+    document = """
     Dr. Ana Horvat (ana.horvat@gmail.com) iz Ljubljane, tel: +386 1 234 5678, rojena 20.5.1980, EMŠO: 2005800500999.
     Janez Novak (janez.novak@email.com) živi v Mariboru, telefon: 031 123 456, rojen 15.3.1985.
     Podjetje ABC d.o.o., direktor: Peter Horvat, naslov: Celovška cesta 15, 1000 Ljubljana, ID za DDV: SI12345678.
     Contact: +1 (555) 123-4567 (US), +44 20 7946 0958 (UK), kartica: 4111 1111 1111 1111.
     Server: 192.168.1.1, Website: https://www.example.com, IBAN: SI56 1910 0000 0123 438.
-    """ * 10  # Repeat 10 times for performance test
+    """
+    # 10 documents for performance test; numbered, since identical texts in a batch
+    # would only be anonymized once
+    documents = [f"Dokument {i}.{document}" for i in range(10)]
+    total_chars = sum(len(doc) for doc in documents)
     
-    print(f"Testing with text of {len(large_text)} characters...")
+    print(f"Testing with {len(documents)} documents of {total_chars} characters in total...")
     
+    # One anonymize_batch call runs CLASSLA over all documents together
     start_time = time.time()
-    result = anonymizer.anonymize_text(large_text)
+    results = anonymizer.anonymize_batch(documents)
     end_time = time.time()
     
     processing_time = end_time - start_time
-    chars_per_second = len(large_text) / processing_time
+    chars_per_second = total_chars / processing_time
+    
+    # Merge the per-document counts
+    total_entities = sum(result['total_entities_masked'] for result in results)
+    detection_methods = Counter()
+    for result in results:
+        detection_methods.update(result['detection_methods'])
     
     print(f"Processing time: {processing_time:.2f} seconds")
     print(f"Speed: {chars_per_second:.0f} characters/second")
-    print(f"Total entities masked: {result['total_entities_masked']}")
-    print(f"Detection methods: {result['detection_methods']}")
+    print(f"Total entities masked: {total_entities}")
+    print(f"Detection methods: {dict(detection_methods)}")
+    
+    # The batch must mask each document exactly as anonymize_text does on its own
+    for document, result in zip(documents, results):
+        assert result['anonymized_text'] == anonymizer.anonymize_text(document)['anonymized_text']
+    print("✓ Batch results match anonymize_text")
+
+def test_streaming():
+    """Test streaming a long document through anonymize_stream."""
+    anonymizer = get_anonymizer()
+    print("\n🌊 Testing Streaming")
+    print("=" * 50)
+    
+    # A long document, fed line by line as if read from a file
+    line = "Janez Novak (janez.novak@email.com) živi v Mariboru, telefon: 031 123 456, IBAN: SI56 1910 0000 0123 438.\n"
+    large_text = line * 500
+    
+    print(f"Streaming a text of {len(large_text)} characters...")
+    
+    start_time = time.time()
+    pieces = anonymizer.anonymize_stream(iter(large_text.splitlines(keepends=True)), chunk_chars=4096)
+    anonymized_text = ''.join(pieces)
+    processing_time = time.time() - start_time
+    
+    print(f"Processing time: {processing_time:.2f} seconds")
+    print(f"Speed: {len(large_text) / processing_time:.0f} characters/second")
+    print(f"First line: {anonymized_text.splitlines()[0]}")
+    
+    # Streaming must mask exactly what a single anonymize_text call does
+    expected = anonymizer.anonymize_text(large_text)['anonymized_text']
+    assert anonymized_text == expected, "anonymize_stream differs from anonymize_text"
+    print("✓ Same as anonymize_text")
 
 def main():
     """Main test function."""
-    global anonymizer
-    
     print("🚀 Comprehensive GDPR Anonymizer Test Suite")
     print("=" * 60)
     print("Testing all capabilities:")
@@ -299,13 +444,13 @@ def main():
     print("2. Google Phone Numbers Library (International validation)")
     print("3. Microsoft Presidio Patterns (Emails, Cards, IPs, etc.)")
     print("4. Regional Patterns (Tax numbers, IDs, Bank accounts)")
-    print("5. Performance testing")
+    print("5. Performance and streaming")
     print("=" * 60)
     
     # Initialize anonymizer
     print("\n🔧 Initializing anonymizer...")
     start_time = time.time()
-    anonymizer = ComprehensiveGDPRAnonymizer(language='sl')
+    get_anonymizer()
     init_time = time.time() - start_time
     print(f"✓ Initialized in {init_time:.2f} seconds")
     
@@ -316,7 +461,12 @@ def main():
     test_regional_patterns()
     test_comprehensive_scenarios()
     test_descriptive_masking()
+    test_overlapping_patterns()
+    test_word_boundaries()
+    test_regex_backends_agree()
+    test_email_validation()
     test_performance()
+    test_streaming()
     
     print("\n" + "=" * 60)
     print("🎉 All tests completed successfully!")